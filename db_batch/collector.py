@@ -1,6 +1,7 @@
+from queue import Empty
 from threading import Thread
 
-from db_batch.misc_os import copy_files
+from db_batch.misc_os import copy_files_many
 
 
 class Collector(Thread):
@@ -8,12 +9,13 @@ class Collector(Thread):
     Collects and copies output files.
 
     This thread monitors queue object to find files which need to be copied.
+    All the requests available in the queue are copied together as one batch.
     Kwargs define the form of copied outputs. There are various options to
     modify a title and a structure of copied results.
 
     Parameters
     ----------
-    queue : Queue
+    queue : SimpleQueue
         A queue object to communicate with watcher threads.
     output_root_dir : str, path like
         A path to the output folder.
@@ -55,17 +57,30 @@ class Collector(Thread):
         self._running = True
 
         while self._running:
-            res = self.queue.get()
+            batch = [self.queue.get()]
 
-            if res == "DONE":
-                break
+            # drain all pending requests without blocking
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            done = "DONE" in batch
+            batch = [res for res in batch if res != "DONE"]
 
-            srcs, model_name = res
-            copy_files(
-                srcs,
-                self.output_root_dir,
-                model_name=model_name,
-                include_model_name=self.include_model_name,
-                make_subdirs=self.make_subdirs,
-                include_orig_name=self.include_orig_name,
-            )
+            if batch:
+                try:
+                    copy_files_many(
+                        batch,
+                        self.output_root_dir,
+                        include_model_name=self.include_model_name,
+                        make_subdirs=self.make_subdirs,
+                        include_orig_name=self.include_orig_name,
+                    )
+                except OSError as e:
+                    models = ", ".join(model_name for _, model_name in batch)
+                    print("Cannot copy outputs of '{}': {}".format(models, e))
+
+            if done:
+                break
@@ -1,8 +1,6 @@
 import argparse
 import os
 
-from db_batch.run_batch import run_batch
-
 DB_PATH = "C:/Program Files (x86)/DesignBuilder/designbuilder.exe"
 JOB_SERVER_DIR = "C:/ProgramData/DesignBuilder/JobServer/Users/User"
 DB_DATA = os.path.join(os.getenv("LOCALAPPDATA"), "DesignBuilder")
@@ -95,6 +93,11 @@ parser.add_argument(
 parser.add_argument(
     "--report", action="store_true", help="write a simple batch summary report"
 )
+parser.add_argument(
+    "--reportFlush",
+    type=int,
+    help="write report records every n models (default: when batch finishes)",
+)
 parser.add_argument(
     "--changeAttr",
     action="append",
@@ -105,6 +108,11 @@ parser.add_argument(
 
 if __name__ == "__main__":
     args = parser.parse_args()
+
+    # batch machinery is imported only once arguments are valid,
+    # so '--help' and argument errors return immediately
+    from db_batch.run_batch import run_batch
+
     kwargs = {
         "models_dirs_depth": args.nSubDirs,
         "analysis_type": args.analysis,
@@ -118,6 +126,7 @@ if __name__ == "__main__":
         "include_model_name": not args.noModelNames,
         "include_orig_name": args.originalNames,
         "write_report": args.report,
+        "report_flush_every": args.reportFlush,
         "use_sim_manager": args.useSimManager,
         "change_attributes": args.changeAttr,
         "sim_start_date": args.simStartDate,
@@ -1,51 +1,176 @@
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from shutil import copyfile
 
 import psutil
 
+__all__ = [
+    "fast_exists",
+    "fast_isdir",
+    "list_dir_names",
+    "group_by_dir",
+    "list_files",
+    "to_absolute",
+    "copy_files",
+    "copy_files_many",
+    "file_name",
+    "split_file_name_ext",
+    "copy_file",
+    "get_process",
+    "on_terminate",
+    "kill_process",
+]
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _CopyFileExW = _kernel32.CopyFileExW
+    _CopyFileExW.argtypes = [
+        wintypes.LPCWSTR,
+        wintypes.LPCWSTR,
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+    ]
+    _CopyFileExW.restype = wintypes.BOOL
+
+    _GetFileAttributesW = _kernel32.GetFileAttributesW
+    _GetFileAttributesW.argtypes = [wintypes.LPCWSTR]
+    _GetFileAttributesW.restype = wintypes.DWORD
+else:
+    _CopyFileExW = None
+    _GetFileAttributesW = None
+
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+COPY_FILE_NO_BUFFERING = 0x00001000
+# files larger than this are copied bypassing the system cache
+NO_BUFFERING_MIN_SIZE = 128 * 1024 * 1024
+
+# shared pool to overlap copies (I/O waits) of multiple output files
+_COPY_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DB_BATCH_COPY_THREADS", 8)),
+    thread_name_prefix="db_batch_copy",
+)
+
+
+def fast_exists(pth):
+    """
+    Check if the given path exists.
+
+    On Windows, this calls 'GetFileAttributesW' directly
+    instead of going through 'os.stat'.
+    """
+    if _GetFileAttributesW is None:
+        return os.path.exists(pth)
+    return _GetFileAttributesW(os.fspath(pth)) != INVALID_FILE_ATTRIBUTES
+
+
+def fast_isdir(pth):
+    """
+    Check if the given path is an existing directory.
+
+    On Windows, this calls 'GetFileAttributesW' directly
+    instead of going through 'os.stat'.
+    """
+    if _GetFileAttributesW is None:
+        return os.path.isdir(pth)
+    attrs = _GetFileAttributesW(os.fspath(pth))
+    return attrs != INVALID_FILE_ATTRIBUTES and bool(attrs & FILE_ATTRIBUTE_DIRECTORY)
 
-def list_dirs(pth):
-    """Return sub-directory paths."""
-    content = os.listdir(pth)
-    dirs = []
-    for name in content:
-        dir_pth = os.path.join(pth, name)
-        if os.path.isdir(dir_pth):
-            dirs.append(dir_pth)
-    return dirs
 
+def list_dir_names(pth):
+    """Return a set of sub-directory names."""
+    with os.scandir(pth) as it:
+        return {entry.name for entry in it if entry.is_dir(follow_symlinks=False)}
+
+
+def group_by_dir(paths):
+    """
+    Group paths by their parent directory.
+
+    Returns a dictionary {parent: {name: path}}, names
+    are normalized using 'os.path.normcase'.
+    """
+    paths_by_dir = {}
+    for path in paths:
+        parent, name = os.path.split(path)
+        paths_by_dir.setdefault(parent, {})[os.path.normcase(name)] = path
+    return paths_by_dir
+
+
+def list_files(root, depth=1, ext="dsb", name_contains=None):
+    """
+    Return a list of all files with specified extension(s).
 
-def list_files(root, depth=1, ext="dsb"):
-    """Return a list of all files with specified extension."""
+    When 'name_contains' is given, only files which
+    have the string in their name are included.
+    """
     files_lst = []
 
-    if not os.path.isdir(root):
+    if not fast_isdir(root):
         raise FileNotFoundError("Root folder '{}' does not exist!".format(root))
 
-    _walk(root, files_lst, depth=depth, ext=ext)
+    _walk(
+        root,
+        files_lst,
+        depth=depth,
+        ext=_normalize_ext(ext),
+        name_contains=name_contains,
+    )
     return files_lst
 
 
-def to_absolute(paths):
-    """Convert relative paths to absolute."""
-    return [Path(path).resolve() for path in paths]
+def _normalize_ext(ext):
+    """Return a tuple of lower case extensions including a leading dot."""
+    if not ext:
+        return None
+
+    if isinstance(ext, str):
+        ext = [ext]
+
+    return tuple({e.lower() if e.startswith(".") else "." + e.lower() for e in ext})
+
+
+def to_absolute(paths, resolve_symlinks=False):
+    """
+    Convert relative paths to absolute.
+
+    Paths are only normalized (without touching the file system),
+    symbolic links are resolved when 'resolve_symlinks' is 'True'.
+    """
+    if resolve_symlinks:
+        return [str(Path(path).resolve()) for path in paths]
+    return [os.path.abspath(path) for path in paths]
+
 
+def _walk(root, files, depth=1, ext=None, name_contains=None):
+    """
+    Walk directories to pick up files with specified extension(s).
 
-def _walk(root, files, depth=1, ext=None):
-    """Walk directories to pick up files with specified extension."""
+    Extensions need to be given as a tuple of lower case strings.
+    """
     dirs = []
-    for name in os.listdir(root):
-        pth = os.path.join(root, name)
-        if os.path.isfile(pth):
-            if ext:
-                if pth.lower().endswith(ext):
-                    files.append(pth)
-        else:
-            dirs.append(pth)
-    if depth > 1:
-        for pth in dirs:
-            _walk(pth, files, depth=depth - 1, ext=ext)
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_file():
+                name = entry.name
+                if (
+                    ext
+                    and name.lower().endswith(ext)
+                    and (not name_contains or name_contains in name)
+                ):
+                    files.append(entry.path)
+            elif depth > 1 and entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+
+    for pth in dirs:
+        _walk(pth, files, depth=depth - 1, ext=ext, name_contains=name_contains)
 
 
 def copy_files(
@@ -57,15 +182,68 @@ def copy_files(
     include_orig_name=False,
 ):
     """Copy multiple files specified into a specific location."""
-    for src in srcs:
-        copy_file(
-            src,
-            dest,
-            model_name=model_name,
-            include_model_name=include_model_name,
-            make_subdirs=make_subdirs,
-            include_orig_name=include_orig_name,
-        )
+    copy_files_many(
+        [(srcs, model_name)],
+        dest,
+        include_model_name=include_model_name,
+        make_subdirs=make_subdirs,
+        include_orig_name=include_orig_name,
+    )
+
+
+def copy_files_many(
+    batch,
+    dest,
+    include_model_name=True,
+    make_subdirs=False,
+    include_orig_name=False,
+):
+    """
+    Copy files of multiple models into a specific location.
+
+    Files are copied in parallel using a shared thread pool,
+    the function returns once all the files are copied.
+    When multiple files share the same destination, only
+    the last one is copied.
+
+    Parameters
+    ----------
+    batch : list of (list of (str, path like), str)
+        Pairs of source file paths and a model name.
+    dest : str, path like
+        Destination directory.
+
+    Other parameters are the same as for 'copy_file'.
+
+    """
+    kwargs = {
+        "include_model_name": include_model_name,
+        "make_subdirs": make_subdirs,
+        "include_orig_name": include_orig_name,
+    }
+    # parallel copies into the same file would mix their content,
+    # keep only the last source for each destination
+    jobs = {}
+    for srcs, model_name in batch:
+        for src in srcs:
+            dest_dir, dest_pth = _copy_paths(src, dest, model_name=model_name, **kwargs)
+            key = os.path.normcase(os.path.abspath(dest_pth))
+            jobs[key] = (src, dest_dir, dest_pth)
+    jobs = list(jobs.values())
+
+    # create destination directories once, before copying to avoid races
+    for dest_dir in {dest_dir for _, dest_dir, _ in jobs}:
+        os.makedirs(dest_dir, exist_ok=True)
+
+    if len(jobs) <= 1:
+        for src, _, dest_pth in jobs:
+            _copy(src, dest_pth)
+        return
+
+    futures = [_COPY_POOL.submit(_copy, src, dest_pth) for src, _, dest_pth in jobs]
+    for future in futures:
+        # wait for all copies, errors are re-raised here
+        future.result()
 
 
 def file_name(pth):
@@ -87,14 +265,6 @@ def split_file_name_ext(pth):
     return os.path.splitext(basename)
 
 
-def create_dir(dir_pth):
-    """Create directory for the specified dir path."""
-    try:
-        os.makedirs(dir_pth)
-    except OSError:
-        pass
-
-
 def copy_file(
     src,
     dest,
@@ -125,32 +295,76 @@ def copy_file(
         If this is 'True' original name will be included in the
         copy title.
     """
-    orig_name, ext = split_file_name_ext(src)
-    out = file_name(src)
+    dest_dir, dest_pth = _copy_paths(
+        src,
+        dest,
+        model_name=model_name,
+        include_model_name=include_model_name,
+        make_subdirs=make_subdirs,
+        include_orig_name=include_orig_name,
+    )
+    os.makedirs(dest_dir, exist_ok=True)
+    _copy(src, dest_pth)
+
+
+def _copy_paths(
+    src,
+    dest,
+    model_name=None,
+    include_model_name=True,
+    make_subdirs=False,
+    include_orig_name=False,
+):
+    """Return destination directory and file path for the copied file."""
+    out = os.path.basename(src)
 
     if model_name and include_model_name:
+        orig_name, ext = os.path.splitext(out)
         if include_orig_name:
             out = "{} - {}{}".format(model_name, orig_name, ext)
         else:
             out = "{}{}".format(model_name, ext)
 
     if make_subdirs and model_name:
-        create_dir(os.path.join(dest, model_name))
-        dest = os.path.join(dest, model_name, out)
-    else:
-        dest = os.path.join(dest, out)
+        dest = os.path.join(dest, model_name)
+
+    return dest, os.path.join(dest, out)
 
+
+def _copy(src, dest_pth):
+    """Copy file, report failure."""
     try:
-        copyfile(src, dest)
+        _copyfile(src, dest_pth)
     except IOError:
-        print("Cannot copy file '{}' to '{}'.".format(src, dest))
+        print("Cannot copy file '{}' to '{}'.".format(src, dest_pth))
+
+
+def _copyfile(src, dest):
+    """
+    Copy file data using the fastest available system call.
+
+    On Windows, the copy is delegated directly to 'CopyFileExW'
+    so the data never leaves the kernel, other platforms
+    use 'shutil.copyfile' (which uses 'sendfile' on Linux).
+    """
+    if _CopyFileExW is None:
+        copyfile(src, dest)
+        return
+
+    flags = 0
+    if os.path.getsize(src) >= NO_BUFFERING_MIN_SIZE:
+        flags |= COPY_FILE_NO_BUFFERING
+
+    if not _CopyFileExW(os.fspath(src), os.fspath(dest), None, None, None, flags):
+        raise ctypes.WinError(ctypes.get_last_error())
 
 
 def get_process(name):
     """Get process by name."""
-    for p in psutil.process_iter():
-        if p.name() == name:
+    for p in psutil.process_iter(attrs=["name"]):
+        if p.info["name"] == name:
             return p
+    return None
 
 
 def on_terminate(proc):
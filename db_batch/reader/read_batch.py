@@ -1,13 +1,16 @@
-import shutil
 from pathlib import Path
 
-from db_batch.misc_os import list_files
+from db_batch.misc_os import copy_files_many, list_files
 from db_batch.reader.sbem_reader import SbemRequest, get_results
 
 ROOT = Path(r"C:\Users\vojtechp1\Desktop\Testing\SBEM\Ireland - 6.1.7.001")
 if __name__ == "__main__":
-    pths = list_files(Path(ROOT, "TC22_Models_all_outputs"), ext="inp", depth=2)
-    pths = [pth for pth in pths if "model_ber" in pth]
+    pths = list_files(
+        Path(ROOT, "TC22_Models_all_outputs"),
+        ext="inp",
+        depth=2,
+        name_contains="model_ber",
+    )
     req = SbemRequest(
         "ACTUAL - BUILDING-DATA",
         "BUILDING_DATA",
@@ -26,6 +29,9 @@ if __name__ == "__main__":
     # only model_ber files are required for validation
     dest_root = Path(ROOT, "TC22_Models_out")
     dest_root.mkdir(exist_ok=True)
-    for source_path in pths:
-        name = Path(source_path).name
-        shutil.copy(source_path, Path(dest_root, name))
+    # files share the same name, prefix them with the model directory name
+    copy_files_many(
+        [([pth], Path(pth).parent.name) for pth in pths],
+        dest_root,
+        include_orig_name=True,
+    )
@@ -6,21 +6,99 @@ compare outputs between different versions.
 
 """
 
+import hashlib
 import json
 import os
-from collections import defaultdict, namedtuple
-from functools import partial
-from typing import List, Union
+import pickle
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Union
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 SbemRequest = namedtuple("SbemRequest", "parent_obj child_obj attributes")
 
+# bump when the structure of processed content changes
+CACHE_VERSION = 1
+# set 'DB_BATCH_CACHE_DIR' to an empty string to disable caching
+CACHE_DIR = os.environ.get(
+    "DB_BATCH_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".db_batch_cache")
+)
 
-def get_results(inp_pths: Union[List[str], str], request: tuple) -> pd.DataFrame:
+# minimum number of seconds between two progress updates
+PROGRESS_INTERVAL = 0.1
+
+
+def disk_cached(func):
+    """
+    Cache processed file content on disk.
+
+    The content is stored as a pickle in 'CACHE_DIR', it's reused
+    as long as the file modification time and size do not change.
+    Nothing is cached when 'CACHE_DIR' is empty.
+    """
+
+    @wraps(func)
+    def wrapper(self, path):
+        if not CACHE_DIR:
+            return func(self, path)
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            return func(self, path)
+
+        key = (CACHE_VERSION, st.st_mtime_ns, st.st_size)
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        cache_pth = os.path.join(CACHE_DIR, name + ".pkl")
+
+        content = _load_cached(cache_pth, key)
+        if content is None:
+            content = func(self, path)
+            if content is not None:
+                _store_cached(cache_pth, key, content)
+
+        return content
+
+    return wrapper
+
+
+def _load_cached(cache_pth, key):
+    """Return cached content, 'None' if it's not available or outdated."""
+    try:
+        with open(cache_pth, "rb") as f:
+            cached_key, content = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    return content if cached_key == key else None
+
+
+def _store_cached(cache_pth, key, content):
+    """Write content into the cache, failures are ignored."""
+    # write into a temporary file first, as parallel
+    # workers may process the same file at the same time
+    tmp_pth = "{}.{}.tmp".format(cache_pth, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cache_pth), exist_ok=True)
+        with open(tmp_pth, "wb") as f:
+            pickle.dump((key, content), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_pth, cache_pth)
+    except OSError:
+        pass
+
+
+def get_results(inp_pths: Union[List[str], str], request: tuple) -> "pd.DataFrame":
     """
     Extract results from given input file paths.
 
+    Files are processed in parallel using a pool of processes,
+    so the call needs to be guarded by 'if __name__ == "__main__"'
+    in scripts.
+
     Example
     -------
     outputs = ["KWH/M2-HEAT",
@@ -46,17 +124,75 @@ def get_results(inp_pths: Union[List[str], str], request: tuple) -> pd.DataFrame
         Table with extracted attribute-value data.
 
     """
+    # pandas is slow to import, it's needed only here
+    import pandas as pd
+
     if not isinstance(inp_pths, list):
         inp_pths = [inp_pths]
 
-    sers = []
-    for inp_pth in inp_pths:
-        inp_file = ModelEpcInpFile(inp_pth)
-        print("Extracting results from: '{}'".format(inp_file.name))
-        outputs = inp_file.get_output_vals(*request)
-        sers.append(pd.Series(outputs, name=inp_file.name))
+    par_name, child_name, attr_lst = request
+    extract = partial(_extract, request=(par_name, child_name, tuple(attr_lst)))
+
+    if len(inp_pths) <= 1:
+        rows = _collect(map(extract, inp_pths), len(inp_pths))
+    else:
+        chunksize = max(1, len(inp_pths) // (4 * (os.cpu_count() or 1)))
+        with ProcessPoolExecutor() as executor:
+            rows = _collect(
+                executor.map(extract, inp_pths, chunksize=chunksize), len(inp_pths)
+            )
+
+    _report_missing(rows, par_name, child_name, attr_lst)
+
+    # file names are not unique across directories,
+    # so rows are kept as a list instead of a dict keyed by name
+    return pd.DataFrame.from_records(
+        [outputs or {} for _, outputs in rows], index=[name for name, _ in rows]
+    )
+
+
+def _collect(results, total):
+    """Gather extracted rows, showing a single progress line."""
+    rows = []
+    last = 0
+    for row in results:
+        rows.append(row)
+        now = time.monotonic()
+        if now - last >= PROGRESS_INTERVAL or len(rows) == total:
+            print("\rExtracting results: {}/{}".format(len(rows), total), end="")
+            last = now
+    if rows:
+        print()
+    return rows
+
+
+def _report_missing(rows, par_name, child_name, attr_lst):
+    """Print a single summary of objects and attributes which were not found."""
+    missing_obj = [name for name, outputs in rows if outputs is None]
+    if missing_obj:
+        print(
+            "Object: '{} > {}' was not found in:\n\t{}".format(
+                par_name, child_name, "\n\t".join(missing_obj)
+            )
+        )
+
+    missing_attrs = [
+        attr
+        for attr in attr_lst
+        if any(outputs is not None and attr not in outputs for _, outputs in rows)
+    ]
+    if missing_attrs:
+        print(
+            "Attributes were not found in some files:\n\t{}".format(
+                "\n\t".join(missing_attrs)
+            )
+        )
+
 
-    return pd.DataFrame(sers)
+def _extract(inp_pth, request):
+    """Extract requested outputs from a single file, return (name, outputs)."""
+    inp_file = ModelEpcInpFile(inp_pth)
+    return inp_file.name, inp_file.get_output_vals(*request)
 
 
 class ModelEpcInpFile:
@@ -95,6 +231,12 @@ class ModelEpcInpFile:
     'get_results' function can be used to extract outputs
     from multiple files in one go.
 
+    Processed content is cached on disk (see 'disk_cached'),
+    in '~/.db_batch_cache' by default. The location can be
+    changed using 'DB_BATCH_CACHE_DIR' environment variable,
+    an empty value disables the cache. The directory can be
+    safely deleted at any time.
+
     """
 
     def __init__(self, path):
@@ -116,46 +258,25 @@ class ModelEpcInpFile:
                 all_objects[k].append(name)
         return all_objects
 
-    def _get_attr(self, obj, attr):
-        """Get attribute value."""
-        try:
-            return obj[attr]
-        except KeyError:
-            print(
-                "Attribute: '{}' was not found.\n"
-                "Available options are:\n\t{}".format(attr, "\n\t".join(obj.keys()))
-            )
-
     def get_output_vals(self, par_name, child_name, attr_lst):
-        """Return a dictionary {attr: val, ...} for a given object."""
+        """
+        Return a dictionary {attr: val, ...} for a given object.
+
+        Missing (or empty) attributes are not included, 'None'
+        is returned when the object does not exist.
+        """
         obj = self._get_child_obj(par_name, child_name)
-        attrs = {}
 
         if not obj:
             return
 
-        for attr in attr_lst:
-            val = self._get_attr(obj, attr)
-
-            if not val:
-                continue
-
-            attrs[attr] = val
-
-        return attrs
+        return {attr: obj[attr] for attr in attr_lst if obj.get(attr)}
 
     def _get_obj(self, obj, parent_obj):
-        """Fetch object content."""
-        try:
-            return parent_obj[obj]
-
-        except KeyError:
-            print(
-                "Object: '{}' was not found.\n"
-                "Available options are:\n\t{}".format(
-                    obj, "\n\t".join(parent_obj.keys())
-                )
-            )
+        """Fetch object content, return 'None' if it does not exist."""
+        if not parent_obj:
+            return None
+        return parent_obj.get(obj)
 
     def _get_main_obj(self, obj_name):
         """Fetch main object content."""
@@ -200,18 +321,32 @@ class ModelEpcInpFile:
     @staticmethod
     def process_line(line):
         """Clean up the given data."""
-        line = line.replace('"', "")
-        line = line.strip()
-        name, obj = line.split("=")
+        # both parts are stripped, so the whole line does not need to be
+        name, obj = line.replace('"', "").split("=")
         return name.strip(), obj.strip()
 
-    def process_object(self, file, objects, name, obj, building):
-        """Populate object data."""
-        b_obj = str(obj)
+    def process_object(self, lines, i, objects, name, obj, building):
+        """
+        Populate object data.
+
+        Object fields are read from the line 'i' until the
+        object terminator ('..') is found. Returns an index
+        of the line following the object and building name.
+        """
+        n_lines = len(lines)
+        is_building = obj == "BUILDING-DATA"
+
+        if is_building or obj == "HVAC-SYSTEM-DATA":
+            b_obj = "{} - {}".format(building, obj)
+        else:
+            b_obj = str(obj)
 
-        while True:
-            line = file.readline()
-            line = line.strip()
+        # innermost dictionary is resolved only when the object key changes
+        target = None
+
+        while i < n_lines:
+            line = lines[i].strip()
+            i += 1
 
             if line == "":
                 continue
@@ -219,30 +354,32 @@ class ModelEpcInpFile:
             if ".." in line:
                 break
 
-            field, value = self.process_line(line)
+            # inlined 'process_line', this is the hottest loop
+            field, value = line.replace('"', "").split("=")
+            field, value = field.strip(), value.strip()
 
-            if obj == "BUILDING-DATA" and field == "ANALYSIS":
+            if is_building and field == "ANALYSIS" and value != building:
                 building = value
-
-            if obj == "BUILDING-DATA" or obj == "HVAC-SYSTEM-DATA":
                 b_obj = "{} - {}".format(building, obj)
+                target = None
 
-            objects[b_obj][name][field] = value
+            if target is None:
+                target = objects.setdefault(b_obj, {}).setdefault(name, {})
 
-        return building
+            target[field] = value
 
-    def process_file(self, file):
-        """Process .inp file."""
-        objects_dct = defaultdict(partial(defaultdict, dict))
-        building = ""
-
-        while True:
-            line = file.readline()
+        return i, building
 
-            if not line:
-                break
+    def process_file_lines(self, lines):
+        """Process lines of .inp file."""
+        objects_dct = {}
+        building = ""
+        n_lines = len(lines)
+        i = 0
 
-            line = line.strip()
+        while i < n_lines:
+            line = lines[i].strip()
+            i += 1
 
             if line == "":
                 continue
@@ -252,15 +389,17 @@ class ModelEpcInpFile:
 
             if line[0] == '"':
                 name, obj = self.process_line(line)
-                building = self.process_object(file, objects_dct, name, obj, building)
+                i, building = self.process_object(
+                    lines, i, objects_dct, name, obj, building
+                )
 
         return objects_dct
 
+    @disk_cached
     def read_model_epc(self, path):
-        """Open the .inp file and trigger processing."""
+        """Read the whole .inp file and trigger processing."""
         try:
-            with open(path) as input_file:
-                return self.process_file(input_file)
+            return self.process_file_lines(Path(path).read_text().splitlines())
 
         except IOError:
             print("Cannot open file: '{}'.".format(path))
@@ -1,12 +1,11 @@
 import os
 import subprocess
-import threading
 import time
-from queue import Queue
+from queue import SimpleQueue
 
 from db_batch.collector import Collector
 from db_batch.misc_os import (
-    create_dir,
+    group_by_dir,
     kill_process,
     list_files,
     split_file_name_ext,
@@ -19,6 +18,8 @@ DB_PATH = "C:/Program Files (x86)/DesignBuilder/designbuilder.exe"
 TIMEOUT = 600
 DB_DATA = os.path.join(os.getenv("LOCALAPPDATA"), "DesignBuilder")
 JOB_SERVER_DIR = "C:/ProgramData/DesignBuilder/JobServer/Users/User"
+# do not allocate a console window for DesignBuilder (Windows only)
+CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
 WATCH_SBEM = (
     "model.inp",
@@ -74,16 +75,30 @@ def get_loc(analysis):
         )
 
 
-def remove_files(paths):
-    """Delete files for given paths."""
-    for path in paths:
+def remove_files(paths_by_dir):
+    """
+    Delete given files grouped by their parent directory.
+
+    Each directory is listed once, so only existing files
+    are being removed.
+    """
+    for dir_pth, names in paths_by_dir.items():
         try:
-            os.remove(path)
+            with os.scandir(dir_pth) as it:
+                paths = [e.path for e in it if os.path.normcase(e.name) in names]
         except FileNotFoundError:
-            # print("Cannot remove file: '{}'\n\tFile not found!".format(path))
-            pass
-        except PermissionError:
-            print("Cannot remove file: '{}'\n\tAccess denied!".format(path))
+            continue
+        except OSError as e:
+            print("Cannot list directory: '{}'\n\t{}".format(dir_pth, e))
+            continue
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                print("Cannot remove file: '{}'\n\tAccess denied!".format(path))
 
 
 def create_cmnd(
@@ -127,10 +142,12 @@ def create_cmnd(
 
     args.append("miTUpdate")
 
+    # items are joined without spaces, so the command is passed
+    # to DesignBuilder unquoted (unless an item contains spaces)
     if len(args) == 1:
         cmnd = "/process=" + args[0]
     else:
-        cmnd = "/process=" + ", ".join(args)
+        cmnd = "/process=" + ",".join(args)
 
     print(f"Running batch using '{cmnd}' command args. ")
 
@@ -139,10 +156,14 @@ def create_cmnd(
 
 def run_subprocess(file, cmd, db_pth=DB_PATH, timeout=TIMEOUT):
     """Run DesignBuilder file."""
-    cmnd = f"{file} {cmd}"  # add file path to the command
-
     try:
-        subprocess.run([db_pth, cmnd], timeout=timeout)
+        subprocess.run(
+            [db_pth, str(file), cmd],
+            timeout=timeout,
+            creationflags=CREATION_FLAGS,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
         return True
 
     except subprocess.TimeoutExpired:
@@ -195,22 +216,36 @@ def pick_up_files(analysis_type):
 
 
 def init_report(analysis_type, outputs_root_dir, num_models):
-    """Initialize output report file."""
+    """
+    Initialize output report.
+
+    Returns a path to the report file and a buffer (list of str)
+    with the report header. Records are collected in the buffer
+    and written using 'flush_report'.
+    """
     str_tme = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(time.time()))
     name = "summary_{}_{}.txt".format(analysis_type, str_tme)
     report_file = os.path.join(outputs_root_dir, name)
-
-    with open(report_file, "w") as f:
-        f.write(
-            "Running '{}' analysis.\n\tNumber of files: '{}'.\n".format(
-                analysis_type, num_models
-            )
+    report_buf = [
+        "Running '{}' analysis.\n\tNumber of files: '{}'.\n".format(
+            analysis_type, num_models
         )
+    ]
+    return report_file, report_buf
 
-    return report_file
 
+def flush_report(report_file, report_buf):
+    """Append buffered records to the report file and clear the buffer."""
+    # watcher threads may append records meanwhile,
+    # so only the lines which have been written are removed
+    lines = report_buf[:]
+    if lines:
+        with open(report_file, "a") as f:
+            f.writelines(lines)
+        del report_buf[: len(lines)]
 
-def finish_report(report_file, report_dct):
+
+def finish_report(report_buf, report_dct):
     """Summarize batch run analysis."""
     lines = [
         "\n{}".format("*" * 50),
@@ -222,8 +257,7 @@ def finish_report(report_file, report_dct):
         "\n{}".format("*" * 50),
     ]
     print("".join(lines))
-    with open(report_file, "a") as f:
-        f.writelines(lines)
+    report_buf.extend(lines)
 
 
 def run_batch(  # noqa: C901
@@ -240,6 +274,7 @@ def run_batch(  # noqa: C901
     start_index=1,
     end_index=None,
     write_report=True,
+    report_flush_every=None,
     include_model_name=True,
     include_orig_name=False,
     sim_start_date=None,
@@ -284,6 +319,9 @@ def run_batch(  # noqa: C901
     write_report: bool
         Output summary file will be produced in the 'outputs' folder
         when this is 'True'.
+    report_flush_every: int, default None
+        Write collected report records into the file every n models,
+        by default the report is written once the batch finishes.
     include_model_name : bool, default True
         Defines if model name should be included in the copied file title.
     include_orig_name : bool, default False
@@ -344,7 +382,7 @@ def run_batch(  # noqa: C901
 
     # create a queue which will be used to pass
     # the data between watchers and collector thread
-    queue = Queue()
+    queue = SimpleQueue()
 
     # run a collector thread which handles storing of specified output files
     collector = Collector(
@@ -357,93 +395,111 @@ def run_batch(  # noqa: C901
     collector.start()
 
     # create directory to store outputs
-    create_dir(outputs_root_dir)
+    os.makedirs(outputs_root_dir, exist_ok=True)
 
     # initialize a report dictionary
     report_dct = {"skipped": [], "expired": [], "failed": [], "successful": []}
 
-    # initialize a report file if requested
-    report_file = ""
+    # initialize a report if requested
+    report_file, report_buf = None, None
     if write_report:
-        report_file = init_report(analysis_type, outputs_root_dir, len(model_paths))
-
-    # get name of the folder in which outputs are stored
-    locs = get_loc(analysis_type)
-
-    # define full paths for files which should be being watched
-    if watch_files == "default":
-        watch_files = pick_up_files(analysis_type)
-
-    watch_paths = [
-        os.path.join(db_data_dir, loc, file) for file in watch_files for loc in locs
-    ]
-
-    cmnd = create_cmnd(
-        analysis_type,
-        sim_start_date,
-        sim_end_date,
-        use_sim_manager,
-        change_attributes,
-        no_close,
-    )
-
-    for i, path in enumerate(model_paths, start=1):
-        model_name = split_file_name_ext(path)[0]
-
-        # if there are outputs files available from a previous run, these
-        # are removed to guarantee that new files can be properly watched
-        remove_files(watch_paths)
-
-        if i < start_index or i > (end_index if end_index else 9999999):
-            # non-default starting index has been requested
-            # skip until the condition is met
-            print("Skipping {}/{} - '{}'".format(i, len(model_paths), model_name))
-            report_dct["skipped"].append(model_name)
-            continue
-
-        args = [model_name, watch_paths, queue, job_server_dir, report_file, report_dct]
-
-        if analysis_type == "sbem":
-            # job server is not applicable for sbem calculation
-            args = args[:3]
+        report_file, report_buf = init_report(
+            analysis_type, outputs_root_dir, len(model_paths)
+        )
 
-        print("Running {}/{} - '{}'".format(i, len(model_paths), model_name))
+    try:
+        # get name of the folder in which outputs are stored
+        locs = get_loc(analysis_type)
 
-        # run a watcher thread which is responsible for watching
-        # output files based on analysis type
-        w_thread = watcher(analysis_type)(*args)
-        w_thread.start()
+        # define full paths for files which should be being watched
+        if watch_files == "default":
+            watch_files = pick_up_files(analysis_type)
 
-        # run an actual DesignBuilder process
-        finished = run_subprocess(path, cmnd, db_pth=db_pth, timeout=timeout)
+        watch_paths = tuple(
+            os.path.join(db_data_dir, loc, file) for file in watch_files for loc in locs
+        )
+        # the grouping is shared by all watchers and used to clean up old files
+        watch_index = group_by_dir(watch_paths)
+
+        cmnd = create_cmnd(
+            analysis_type,
+            sim_start_date,
+            sim_end_date,
+            use_sim_manager,
+            change_attributes,
+            no_close,
+        )
 
-        if not finished:
-            # kill the thread as the model timeout expired
-            report_dct["expired"].append(model_name)
-            if report_file:
-                with open(report_file, "a") as f:
+        watcher_threads = []
+        for i, path in enumerate(model_paths, start=1):
+            model_name = split_file_name_ext(path)[0]
+
+            # if there are outputs files available from a previous run, these
+            # are removed to guarantee that new files can be properly watched
+            remove_files(watch_index)
+
+            if i < start_index or i > (end_index if end_index else 9999999):
+                # non-default starting index has been requested
+                # skip until the condition is met
+                print("Skipping {}/{} - '{}'".format(i, len(model_paths), model_name))
+                report_dct["skipped"].append(model_name)
+                continue
+
+            args = [
+                model_name,
+                watch_paths,
+                queue,
+                job_server_dir,
+                report_buf,
+                report_dct,
+            ]
+
+            if analysis_type == "sbem":
+                # job server is not applicable for sbem calculation
+                args = args[:3]
+
+            print("Running {}/{} - '{}'".format(i, len(model_paths), model_name))
+
+            # run a watcher thread which is responsible for watching
+            # output files based on analysis type
+            w_thread = watcher(analysis_type)(*args, paths_by_dir=watch_index)
+            w_thread.start()
+            watcher_threads.append(w_thread)
+
+            # run an actual DesignBuilder process
+            finished = run_subprocess(path, cmnd, db_pth=db_pth, timeout=timeout)
+
+            if not finished:
+                # kill the thread as the model timeout expired
+                report_dct["expired"].append(model_name)
+                if write_report:
                     msg = "File '{}' - Timeout expired!".format(model_name)
-                    f.write(msg + "\n")
-
-            w_thread.stop()
-
-        if analysis_type.lower() == "sbem":
-            # for sbem analysis, there cannot be any pending watcher thread
-            # as all the work must be already finished when the parent process ends
-            # some time needs to be given to copy outputs
-            if finished:
-                report_dct["successful"].append(model_name)
-            w_thread.stop()
-            time.sleep(3)
-
-    while threading.active_count() > 2:
-        # wait until all child threads finish
-        # when only main and collector threads are running
-        # program can be terminated
-        time.sleep(1)
-
-    if write_report:
-        finish_report(report_file, report_dct)
-
-    # terminate collector thread gracefully
-    collector.stop()
+                    report_buf.append(msg + "\n")
+
+                w_thread.stop()
+
+            if analysis_type.lower() == "sbem":
+                # for sbem analysis, there cannot be any pending watcher thread
+                # as all the work must be already finished when the parent
+                # process ends, some time needs to be given to copy outputs
+                if finished:
+                    report_dct["successful"].append(model_name)
+                w_thread.stop()
+                time.sleep(3)
+
+            if write_report and report_flush_every and i % report_flush_every == 0:
+                flush_report(report_file, report_buf)
+
+        # wait until all watchers finish
+        for w_thread in watcher_threads:
+            w_thread.join()
+
+        if write_report:
+            finish_report(report_buf, report_dct)
+    finally:
+        if write_report:
+            flush_report(report_file, report_buf)
+
+        # terminate collector thread gracefully, even if the batch failed
+        collector.stop()
+        collector.join()
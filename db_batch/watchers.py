@@ -1,10 +1,37 @@
 """ Set of watchers to monitor calculation progress. """
 
 import os
-import time
-from threading import Thread
+from threading import Event, Thread
 
-from db_batch.misc_os import list_dirs
+from db_batch.misc_os import fast_exists, fast_isdir, group_by_dir, list_dir_names
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # fall back to polling when 'watchdog' is not installed
+    FileSystemEventHandler = object
+    Observer = None
+
+ERR_SUCCESS = b"EnergyPlus Completed Successfully"
+ERR_FATAL = b"EnergyPlus Terminated--Fatal Error Detected"
+ERR_TAIL_SIZE = max(len(ERR_SUCCESS), len(ERR_FATAL)) - 1
+
+
+class WakeHandler(FileSystemEventHandler):
+    """Wake up a watcher once a file or directory appears."""
+
+    def __init__(self, wake_evt):
+        super().__init__()
+        self.wake_evt = wake_evt
+
+    def on_created(self, event):
+        """Wake up on a new file or directory."""
+        self.wake_evt.set()
+
+    def on_moved(self, event):
+        """Wake up on a renamed file or directory."""
+        self.wake_evt.set()
 
 
 class Watcher(Thread):
@@ -12,8 +39,11 @@ class Watcher(Thread):
     A base thread to monitor specified paths.
 
     Given paths are being checked for changes,
-    (using try-read mechanism) to see if actual files
-    have been produced.
+    (listing their parent directories) to see if actual
+    files have been produced. When 'watchdog' package
+    is available, directories are checked only once
+    the system reports a new file, otherwise they are
+    polled in given interval.
 
     Once the calculation finishes (either successfully
     or once timeout expires), watcher needs to be closed
@@ -29,43 +59,136 @@ class Watcher(Thread):
         A name of the monitored model.
     paths : list of (str, path like)
         A list of paths which are being checked for changes.
-    queue : Queue
+    queue : SimpleQueue
         A queue object to communicate with the main part of
         batch processor.
+    interval : float, default 1
+        Number of seconds between two checks.
+    paths_by_dir : dict, default None
+        Given paths grouped by their parent directory (see
+        'group_by_dir'), computed from 'paths' if not given.
 
     """
 
-    def __init__(self, model_name, paths, queue):
+    def __init__(self, model_name, paths, queue, interval=1, paths_by_dir=None):
         super().__init__()
         self.model_name = model_name
         self.paths = paths
         self.queue = queue
-        self._running = False
+        self.interval = interval
+        self._stop_evt = Event()
+        self._wake_evt = Event()
+
+        # watched file names grouped by their parent directory,
+        # so each directory needs to be listed only once per check
+        if paths_by_dir is None:
+            paths_by_dir = group_by_dir(paths)
+        self._paths_by_dir = paths_by_dir
 
     def stop(self):
         """Stop monitoring."""
-        self._running = False
+        self._stop_evt.set()
+        self._wake_evt.set()
 
     def run(self):
         """Monitor given calculation files."""
-        self._running = True
         files = set()
-        while self._running:
-            for path in self.paths:
-                try:
-                    with open(path, "r"):
-                        files.add(path)
-                except FileNotFoundError:
-                    pass
-            time.sleep(1)
+        remaining = self._paths_by_dir
+        observer, timeout = self.observe(remaining.keys())
+        try:
+            while remaining:
+                files.update(self.existing_paths(remaining))
+
+                # stop checking files which have already been found
+                remaining = {
+                    parent: {k: v for k, v in names.items() if v not in files}
+                    for parent, names in remaining.items()
+                }
+                remaining = {k: v for k, v in remaining.items() if v}
+
+                if self.wait(timeout):
+                    break
+        finally:
+            self.unobserve(observer)
+
+        # pick up files created just before the watcher has been stopped
+        files.update(self.existing_paths(remaining))
+
+        # files may still be written, wait until the calculation finishes
+        self._stop_evt.wait()
         self.queue.put((files, self.model_name))
 
+    def observe(self, dirs):
+        """
+        Start observing given directories for new files.
+
+        Returns a running observer (or 'None' if 'watchdog'
+        is not available) and a timeout to wait for file system
+        events. When all directories are observed, the timeout
+        is longer, directories are still checked in case an event
+        gets lost, otherwise directories need to be polled.
+        """
+        if Observer is None:
+            return None, self.interval
+
+        observer = Observer()
+        handler = WakeHandler(self._wake_evt)
+        timeout = self.interval * 5
+        for dir_pth in dirs:
+            if fast_isdir(dir_pth):
+                observer.schedule(handler, dir_pth, recursive=False)
+            else:
+                # directory does not exist yet
+                timeout = self.interval
+
+        try:
+            observer.start()
+        except OSError:
+            # some directories may be already observed, stop them
+            # before falling back to polling
+            observer.stop()
+            if observer.is_alive():
+                observer.join()
+            return None, self.interval
+
+        return observer, timeout
+
+    @staticmethod
+    def unobserve(observer):
+        """Stop observing directories."""
+        if observer:
+            observer.stop()
+            observer.join()
+
+    def wait(self, timeout):
+        """Wait for a file system event, return 'True' once stopped."""
+        self._wake_evt.wait(timeout)
+        self._wake_evt.clear()
+        return self._stop_evt.is_set()
+
+    def existing_paths(self, paths_by_dir=None):
+        """Return watched paths which currently exist."""
+        if paths_by_dir is None:
+            paths_by_dir = self._paths_by_dir
+
+        existing = set()
+        for parent, names in paths_by_dir.items():
+            try:
+                with os.scandir(parent) as it:
+                    found = {os.path.normcase(entry.name) for entry in it}
+                existing.update(names[name] for name in found.intersection(names))
+            except OSError:
+                existing.update(p for p in names.values() if fast_exists(p))
+        return existing
+
 
 class SbemWatcher(Watcher):
     """A watcher thread to monitor sbem outputs processing."""
 
-    def __init__(self, model_name, paths, queue):
-        super().__init__(model_name, paths, queue)
+    def __init__(self, model_name, paths, queue, interval=1, paths_by_dir=None):
+        super().__init__(
+            model_name, paths, queue, interval=interval, paths_by_dir=paths_by_dir
+        )
 
 
 class EplusWatcher(Watcher):
@@ -90,30 +213,43 @@ class EplusWatcher(Watcher):
         A name of the monitored model.
     paths : list of (str, path like)
         A list of paths which are being checked for changes.
-    queue : Queue
+    queue : SimpleQueue
         A queue object to communicate with the main part of
         batch processor.
     job_server_dir : str, path like
         A path to DesignBuilder directory storing Simulation
         Manager jobs.
-    report_file : str, path like
-        A path to the summary output file (if this is 'None',
-        file won't be written)
+    report_buf : list of str
+        A buffer collecting summary report records (if this
+        is 'None', records won't be collected)
+    interval : float, default 1
+        Number of seconds between two checks.
+    paths_by_dir : dict, default None
+        Given paths grouped by their parent directory (see
+        'group_by_dir'), computed from 'paths' if not given.
 
     """
 
     def __init__(
-        self, model_name, paths, queue, job_server_dir, report_file, report_dct
+        self,
+        model_name,
+        paths,
+        queue,
+        job_server_dir,
+        report_buf,
+        report_dct,
+        interval=1,
+        paths_by_dir=None,
     ):
-        super().__init__(model_name, paths, queue)
+        super().__init__(
+            model_name, paths, queue, interval=interval, paths_by_dir=paths_by_dir
+        )
         self.job_server_dir = job_server_dir
-        self.report_file = report_file
+        self.report_buf = report_buf
         self.report_dct = report_dct
 
     def run(self):
         """Monitor EnergyPlus simulation files."""
-        self._running = True
-
         files_dct = {os.path.basename(pth): pth for pth in self.paths}
         new_dir = self.check_simulation_method(files_dct)
 
@@ -125,23 +261,19 @@ class EplusWatcher(Watcher):
         # this is a main check to see if simulation finished successfully
         success = self.read_err_file(files_dct["eplusout.err"])
 
-        files = [v for v in files_dct.values()]
-
         if not success:
             # copy only err and idf file as the other will not be available
             self.report_dct["failed"].append(self.model_name)
 
-            if self.report_file:
-                with open(self.report_file, "a") as f:
-                    msg = f"Model '{self.model_name}' - EnergyPlus failed!"
-                    f.write(msg + "\n")
+            if self.report_buf is not None:
+                msg = f"Model '{self.model_name}' - EnergyPlus failed!"
+                self.report_buf.append(msg + "\n")
 
-            files = list(
-                filter(lambda x: ("eplusout.err" in x or "in.idf" in x), files)
-            )
+            files = [files_dct[k] for k in ("eplusout.err", "in.idf") if k in files_dct]
 
         else:
             self.report_dct["successful"].append(self.model_name)
+            files = list(files_dct.values())
 
         self.queue.put((files, self.model_name))
 
@@ -149,76 +281,77 @@ class EplusWatcher(Watcher):
         """Read the '.err' file to find out a simulation status."""
         while True:
 
-            if not self._running:
+            if self._stop_evt.wait(self.interval):
                 # simulation has ended prematurely - timeout expired
                 # return True to avoid writing E+ failed status
                 return True
 
-            time.sleep(1)
-
-            if not os.path.exists(err_pth):
+            if not fast_exists(err_pth):
                 # wait until the '.err' file is generated
                 continue
 
-            with open(err_pth, "r") as f:
+            with open(err_pth, "rb") as f:
+                tail = b""
 
                 while True:
-                    lines = f.readlines()
-
-                    for line in lines:
-                        if "EnergyPlus Completed Successfully" in line:
-                            print(
-                                f"\tModel: '{self.model_name}' - "
-                                f"EnergyPlus Completed Successfully"
-                            )
-                            return True
-
-                        elif "EnergyPlus Terminated--Fatal Error Detected" in line:
-                            print(
-                                f"\tModel: '{self.model_name}' - "
-                                f"EnergyPlus Terminated--Fatal Error Detected"
-                            )
-                            return False
-
-                    if not self._running:
+                    # only newly appended bytes are read, a short tail
+                    # of the previous chunk is kept to match split messages
+                    chunk = tail + f.read()
+
+                    if ERR_SUCCESS in chunk:
+                        print(
+                            f"\tModel: '{self.model_name}' - "
+                            f"EnergyPlus Completed Successfully"
+                        )
+                        return True
+
+                    elif ERR_FATAL in chunk:
+                        print(
+                            f"\tModel: '{self.model_name}' - "
+                            f"EnergyPlus Terminated--Fatal Error Detected"
+                        )
+                        return False
+
+                    tail = chunk[-ERR_TAIL_SIZE:]
+
+                    if self._stop_evt.wait(0.1):
                         # simulation has ended prematurely - timeout expired
                         # return True to avoid writing E+ failed
                         return True
 
-                    time.sleep(0.1)
-
     def check_simulation_method(self, files_dct):
         """Find simulation method (SM or Standard)"""
         in_pth = files_dct["in.idf"]
         err_pth = files_dct["eplusout.err"]
 
-        original_jobs = list_dirs(self.job_server_dir)
+        # snapshot of job names, only new names are relevant
+        original_jobs = list_dir_names(self.job_server_dir)
 
-        while True:
-
-            if not self._running:
-                break
-
-            time.sleep(1)  # wait a bit
-
-            if not os.path.exists(in_pth):
+        observer, timeout = self.observe(
+            {os.path.dirname(in_pth), os.path.dirname(err_pth), self.job_server_dir}
+        )
+        try:
+            while True:
                 # waiting for idf to be generated
-                continue
-
-            # list the jobs folder again to find out
-            # if a new job has been submitted
-            current_jobs = list_dirs(self.job_server_dir)
-            new_path = set(current_jobs).difference(set(original_jobs))
-
-            if os.path.exists(err_pth):
-                # Error file has been generated in the 'EnergyPlus'
-                # folder, simulation type is standard
-                print("\tRunning standard simulation.")
-                return None
-
-            elif new_path:
-                # new directory has been created in the 'jobs' directory
-                # simulation runs using 'Simulation Manager'
-                new_path = new_path.pop()
-                print("\tRunning simulation using SM.")
-                return new_path
+                if fast_exists(in_pth):
+                    if fast_exists(err_pth):
+                        # Error file has been generated in the 'EnergyPlus'
+                        # folder, simulation type is standard
+                        print("\tRunning standard simulation.")
+                        return None
+
+                    # list the jobs folder again to find out
+                    # if a new job has been submitted
+                    new_jobs = list_dir_names(self.job_server_dir) - original_jobs
+
+                    if new_jobs:
+                        # new directory has been created in the 'jobs' directory
+                        # simulation runs using 'Simulation Manager'
+                        print("\tRunning simulation using SM.")
+                        return os.path.join(self.job_server_dir, new_jobs.pop())
+
+                if self.wait(timeout):
+                    # simulation has ended prematurely - timeout expired
+                    break
+        finally:
+            self.unobserve(observer)